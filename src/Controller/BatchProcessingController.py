@@ -1,4 +1,5 @@
 import datetime
+import os
 import threading
 from PySide6.QtCore import QThreadPool
 from src.Model import DICOMDirectorySearch
@@ -47,6 +48,9 @@ class BatchProcessingController:
         self.timestamp = ""
         self.batch_summary = [{}, ""]
 
+        # CSV file shared by DVH2CSV across a whole batch
+        self.dvh_csv_file = None
+
         # Threadpool for file loading
         self.threadpool = QThreadPool()
         self.interrupt_flag = threading.Event()
@@ -188,27 +192,50 @@ class BatchProcessingController:
         cur_patient_num = 0
         self.timestamp = self.create_timestamp()
 
-        # Loop through each patient
-        for patient in self.dicom_structure.patients.values():
-            # Stop loading
-            if interrupt_flag.is_set():
-                # TODO: convert print to logging
-                print("Stopped Batch Processing")
-                PatientDictContainer().clear()
-                return False
-
-            cur_patient_num += 1
-
-            progress_callback.emit(("Loading patient ({}/{}) .. ".format(
-                                     cur_patient_num, patient_count), 20))
-
-            # Perform processes on patient
-            for process in self.processes:
-                if process == 'roinamecleaning':
-                    continue
-                self.process_functions[process](interrupt_flag,
-                                                progress_callback,
-                                                patient)
+        # DVH2CSV appends every patient to the same file, so open it
+        # once for the whole batch rather than re-opening it and
+        # re-seeking to the end for every patient.
+        if 'dvh2csv' in self.processes:
+            csv_path = self.dvh_output_path + '/CSV/'
+            os.makedirs(csv_path, exist_ok=True)
+            self.dvh_csv_file = open(
+                csv_path + 'DVHs_' + self.timestamp + '.csv',
+                'a', newline='', buffering=1 << 20)
+
+        try:
+            # Loop through each patient
+            for patient in self.dicom_structure.patients.values():
+                # Stop loading
+                if interrupt_flag.is_set():
+                    # TODO: convert print to logging
+                    print("Stopped Batch Processing")
+                    PatientDictContainer().clear()
+                    return False
+
+                cur_patient_num += 1
+
+                progress_callback.emit(("Loading patient ({}/{}) .. ".format(
+                                         cur_patient_num, patient_count), 20))
+
+                # Perform processes on patient
+                for process in self.processes:
+                    if process == 'roinamecleaning':
+                        continue
+                    self.process_functions[process](interrupt_flag,
+                                                    progress_callback,
+                                                    patient)
+        finally:
+            if self.dvh_csv_file is not None:
+                # Remove the file again if no patient exported anything
+                # to it (every patient skipped, failed or interrupted);
+                # the per-patient path only created the file on first
+                # write.
+                csv_file_name = self.dvh_csv_file.name
+                nothing_written = self.dvh_csv_file.tell() == 0
+                self.dvh_csv_file.close()
+                self.dvh_csv_file = None
+                if nothing_written:
+                    os.remove(csv_file_name)
 
         # Perform batch ROI Name Cleaning on all patients
         if 'roinamecleaning' in self.processes:
@@ -356,6 +383,8 @@ class BatchProcessingController:
                                       cur_patient_files,
                                       self.dvh_output_path)
         process.set_filename('DVHs_' + self.timestamp + '.csv')
+        if self.dvh_csv_file is not None:
+            process.set_csv_output(self.dvh_csv_file)
         success = process.start()
 
         # Set process summary
@@ -180,9 +180,9 @@ def dvh2pandas(dict_dvh, patient_id):
     pddf = pd.DataFrame(dvh_csv_list, columns=csv_header).round(2)
     # Fill empty blocks with 0.0
     pddf.fillna(0.0, inplace=True)
-    pddf.set_index('Patient ID', inplace=True)
 
-    # Return pandas dataframe
+    # Return pandas dataframe. 'Patient ID' is already the first
+    # column, so no index needs to be set for export.
     return pddf
 
 
@@ -200,8 +200,11 @@ def dvh2csv(dict_dvh, path, csv_name, patient_id):
     # Convert dvh data to pandas dataframe
     pddf_csv = dvh2pandas(dict_dvh, patient_id)
 
-    # Convert and export pandas dataframe to CSV file
-    pddf_csv.to_csv(tar_path)
+    # Convert and export pandas dataframe to CSV file. The dataframe
+    # keeps 'Patient ID' as a regular first column, which avoids the
+    # set_index reorganization and index formatting on the write path
+    # while producing the same file.
+    pddf_csv.to_csv(tar_path, index=False)
 
 
 def dvh2rtdose(dict_dvh):
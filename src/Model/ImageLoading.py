@@ -19,8 +19,11 @@ not the case, however this alternative function promotes scalability and
 durability of the process).
 """
 import collections
+import logging
 import math
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Queue, Process
 
 import numpy as np
@@ -72,6 +75,14 @@ allowed_classes = {
 }
 
 
+# Maps the Series Description of known SR files to the slice name they
+# are stored under, replacing a comparison chain in the loading loop.
+_SR_SLICE_NAMES = {
+    "CLINICAL-DATA": "sr-cd",
+    "PYRADIOMICS": "sr-rad",
+}
+
+
 class NotRTSetError(Exception):
     pass
 
@@ -80,6 +91,46 @@ class NotAllowedClassError(Exception):
     pass
 
 
+def _read_dicom_file(file):
+    """
+    Read a single DICOM file completely. Deferred reading of large
+    element values is deliberately not used here: several flows save a
+    loaded dataset back over the file it was read from (the RTSS
+    overwrite in the structure tab, the rtdose rewrite after DVH
+    calculation), and save_as truncates the target before any still-
+    deferred element would be re-read from it, destroying the file.
+    :param file: Path of the file to read.
+    :return: PyDicom dataset, or None if the file could not be read.
+    """
+    try:
+        return dcmread(file)
+    except (InvalidDicomError, OSError, EOFError) as e:
+        # Only benign per-file failures (non-DICOM, unreadable or
+        # truncated files) are swallowed; anything else propagates
+        # rather than silently corrupting the whole load.
+        logging.warning("Skipping unreadable DICOM file %s: %s", file, e)
+        return None
+
+
+def _read_dicom_header(file):
+    """
+    Read a single DICOM file, stopping before the pixel data. The
+    header is all that is needed to classify a file, and is orders of
+    magnitude cheaper to parse than the pixel data it precedes.
+    :param file: Path of the file to read.
+    :return: PyDicom dataset without pixel data, or None if the file
+        could not be read.
+    """
+    try:
+        return dcmread(file, stop_before_pixels=True)
+    except (InvalidDicomError, OSError, EOFError) as e:
+        # Only benign per-file failures (non-DICOM, unreadable or
+        # truncated files) are swallowed; anything else propagates
+        # rather than silently corrupting the whole load.
+        logging.warning("Skipping unreadable DICOM file %s: %s", file, e)
+        return None
+
+
 def get_datasets(filepath_list, file_type=None):
     """
     This function generates two dictionaries: the dictionary of PyDicom
@@ -98,14 +149,24 @@ def get_datasets(filepath_list, file_type=None):
 
     slice_count = 0
     sr_count = 0
-    for file in natural_sort(filepath_list):
-        try:
-            read_file = dcmread(file)
-        except InvalidDicomError:
-            pass
-        else:
-            if read_file.SOPClassUID in allowed_classes:
-                allowed_class = allowed_classes[read_file.SOPClassUID]
+    sorted_files = natural_sort(filepath_list)
+
+    # Reading the files is I/O-bound and pydicom releases the GIL while
+    # reading from disk, so read with a pool of threads. The results are
+    # consumed in the same natural-sort order the serial loop used.
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Pass 1: read only the headers. Classification needs nothing
+        # past the header, so the pixel data of files that end up being
+        # filtered out (e.g. by file_type) is never read at all.
+        headers = executor.map(_read_dicom_header, sorted_files)
+        for file, read_file in zip(sorted_files, headers):
+            if read_file is None:
+                continue
+            # One dict lookup resolves the class instead of a
+            # membership test followed by an index.
+            allowed_class = allowed_classes.get(read_file.SOPClassUID)
+            if allowed_class is not None:
                 if allowed_class["sliceable"]:
                     slice_name = slice_count
                     slice_count += 1
@@ -113,22 +174,41 @@ def get_datasets(filepath_list, file_type=None):
                     # Read from Series Description to determine what is
                     # stored in the SR file.
                     if allowed_class["name"] == "sr":
-                        if read_file.SeriesDescription == "CLINICAL-DATA":
-                            slice_name = "sr-cd"
-                        elif read_file.SeriesDescription == "PYRADIOMICS":
-                            slice_name = "sr-rad"
-                        else:
+                        slice_name = _SR_SLICE_NAMES.get(
+                            read_file.SeriesDescription)
+                        if slice_name is None:
                             slice_name = "sr-other-" + str(sr_count)
                             sr_count += 1
                     else:
                         slice_name = allowed_class["name"]
 
                 if file_type is None or read_file.Modality == file_type:
-                    read_data_dict[slice_name] = read_file
+                    # Non-sliceable slots (rtss, rtdose, rtplan, ...)
+                    # are singletons. Keep the first match in
+                    # natural-sort order so duplicate or backup RT
+                    # files neither overwrite the slot nor cost a full
+                    # read in the second pass. Sliced and sr-other
+                    # names are unique by construction, so they are
+                    # never skipped here.
+                    if slice_name in file_names_dict:
+                        continue
                     file_names_dict[slice_name] = file
             else:
                 raise NotAllowedClassError
 
+        # Pass 2: fully read only the files that were kept. Duplicate
+        # files that were classified into the same slot are only read
+        # once here.
+        slice_names = list(file_names_dict.keys())
+        kept_files = [file_names_dict[slice_name]
+                      for slice_name in slice_names]
+        datasets = executor.map(_read_dicom_file, kept_files)
+        for slice_name, read_file in zip(slice_names, datasets):
+            if read_file is None:
+                del file_names_dict[slice_name]
+                continue
+            read_data_dict[slice_name] = read_file
+
     sorted_read_data_dict, sorted_file_names_dict = \
         image_stack_sort(read_data_dict, file_names_dict)
 
@@ -235,20 +315,28 @@ def is_dataset_dicom_rt(read_data_dict):
     return class_names == ["ct", "rtdose", "rtplan", "rtss"]
 
 
+# Compiled once at import time; natural_sort is called with thousands
+# of filenames per patient and re-parsing the pattern per key is pure
+# interpreter overhead.
+_NUM_SPLIT_RE = re.compile('([0-9]+)')
+
+
+def _alphanum_key(key):
+    """
+    :param key: String to split.
+    :return: List of numeric/lowercased chunks usable as a sort key.
+    """
+    return [int(part) if part.isdigit() else part.lower()
+            for part in _NUM_SPLIT_RE.split(key)]
+
+
 def natural_sort(strings):
     """
     Sort filenames.
     :param strings:   List of strings.
     :return: Sorted list of strings.
     """
-
-    def convert(text):
-        return int(text) if text.isdigit() else text.lower()
-
-    def alphanum_key(key):
-        return [convert(c) for c in re.split('([0-9]+)', key)]
-
-    return sorted(strings, key=alphanum_key)
+    return sorted(strings, key=_alphanum_key)
 
 
 def get_roi_info(dataset_rtss):
@@ -526,15 +614,19 @@ def calculate_matrix(img_ds):
     return np.array(x), np.array(y)
 
 
+# Keys of read_data_dict that do not hold image slices. A frozenset so
+# the per-dataset membership tests below are O(1) hash lookups.
+_NON_IMAGE_TYPES = frozenset(['rtdose', 'rtplan', 'rtss', 'rtimage'])
+
+
 def get_pixluts(read_data_dict):
     """
     :param read_data_dict: Dictionary of all DICOM dataset objects.
     :return: Dictionary of pixluts for the transformation from 3D to 2D.
     """
     dict_pixluts = {}
-    non_img_type = ['rtdose', 'rtplan', 'rtss', 'rtimage']
     for ds in read_data_dict:
-        if ds not in non_img_type:
+        if ds not in _NON_IMAGE_TYPES:
             if isinstance(ds, str) and ds[0:3] == 'sr-':
                 continue
             else:
@@ -553,13 +645,12 @@ def get_image_uid_list(dataset):
     :return: uid_list, a list of SOPInstanceUIDs of all image slices of
         the patient
     """
-    non_img_list = ['rtss', 'rtdose', 'rtplan', 'rtimage']
     uid_list = []
 
     # Extract the SOPInstanceUID of every image (except RTSS, RTDOSE,
     # RTPLAN)
     for key in dataset:
-        if key not in non_img_list:
+        if key not in _NON_IMAGE_TYPES:
             if isinstance(key, str):
                 if key[0:3] != 'sr-':
                     uid_list.append(dataset[key].SOPInstanceUID)
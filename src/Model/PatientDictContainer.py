@@ -99,6 +99,23 @@ class PatientDictContainer(metaclass=Singleton):
         """
         return self.additional_data.get(keyword)
 
+    def image_stack(self):
+        """
+        The image slices of the loaded dataset as a list in slice
+        order. The dataset dictionary stores slices under contiguous
+        integer keys mixed with RT modality string keys; consumers that
+        only want the image stack can use this instead of
+        special-casing key types, and new code should prefer it over
+        indexing self.dataset with slice numbers.
+        :return: List of PyDicom dataset objects, one per image slice.
+        """
+        stack = []
+        slice_number = 0
+        while slice_number in self.dataset:
+            stack.append(self.dataset[slice_number])
+            slice_number += 1
+        return stack
+
     def has_modality(self, dicom_type):
         """
         Example usage: dicom_data.has_modality("rtdose")
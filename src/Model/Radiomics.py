@@ -79,11 +79,17 @@ def get_radiomics_df(path, patient_hash, nrrd_file_path, mask_folder_path):
     radiomics_headers = []
     feature_vector = ''
 
+    # Scan the mask folder once. DirEntry reuses the file type from the
+    # directory read itself, so no per-entry stat call is needed and the
+    # directory is not enumerated a second time for the loop below.
+    with os.scandir(mask_folder_path) as it:
+        mask_files = [entry.name for entry in it if entry.is_file()]
+
     # If RTSS selected has no ROIS
-    if not os.listdir(mask_folder_path):
+    if not mask_files:
         return None
 
-    for file in os.listdir(mask_folder_path):
+    for file in mask_files:
         # Contains features for current ROI
         roi_features = []
         roi_features.append(patient_hash)
@@ -1,9 +1,16 @@
+import csv
 import os
+import numpy as np
 from src.Model import CalculateDVHs
 from src.Model import ImageLoading
 from src.Model.batchprocessing.BatchProcess import BatchProcess
 from src.Model.PatientDictContainer import PatientDictContainer
-import pandas as pd
+
+# Header rows cached by maximum sampled dose. Patients that share a
+# dose grid resolution produce the same header, so after the first
+# patient of a batch the thousands of '<i>cGy' strings are reused
+# rather than rebuilt per patient.
+_DOSE_HEADERS = {}
 
 
 class BatchProcessDVH2CSV(BatchProcess):
@@ -46,8 +53,15 @@ class BatchProcessDVH2CSV(BatchProcess):
         self.required_classes = ('rtss', 'rtdose')
         self.ready = self.load_images(patient_files, self.required_classes)
         self.output_path = output_path
+        # Resolved once here rather than rebuilt on every start() call
+        self.csv_path = self.output_path + '/CSV/'
         self.filename = "DVHs_.csv"
 
+        # An open CSV file shared across the whole batch. When set (via
+        # set_csv_output), rows are appended to it instead of the file
+        # being re-opened for every patient.
+        self.csv_file = None
+
     def start(self):
         """
         Goes through the steps of the DVH2CSV conversion.
@@ -112,25 +126,28 @@ class BatchProcessDVH2CSV(BatchProcess):
         self.progress_callback.emit(("Exporting DVH to CSV...", 90))
 
         # Get path to save to
-        path = self.output_path + '/CSV/'
+        path = self.csv_path
 
         # Get patient ID
         patient_id = self.patient_dict_container.dataset['rtss'].PatientID
 
-        # Make CSV directory if it doesn't exist
-        if not os.path.isdir(path):
-            os.mkdir(path)
+        # Make CSV directory if it doesn't exist (the batch controller
+        # has already created it when it supplies a shared output file)
+        if self.csv_file is None:
+            os.makedirs(path, exist_ok=True)
 
         # Save the DVH to a CSV file
         self.progress_callback.emit(("Exporting DVH to RT Dose...", 95))
-        self.dvh2csv(raw_dvh, path, self.filename, patient_id)
+        self.dvh2csv(raw_dvh, path, self.filename, patient_id,
+                     csv_file=self.csv_file)
 
         # Save the DVH to the RT Dose
         CalculateDVHs.dvh2rtdose(raw_dvh)
 
         return True
 
-    def dvh2csv(self, dict_dvh, path, csv_name, patient_id):
+    def dvh2csv(self, dict_dvh, path, csv_name, patient_id,
+                chunk_size=1000, csv_file=None):
         """
         Export dvh data to csv file.
         Append to existing file
@@ -138,50 +155,104 @@ class BatchProcessDVH2CSV(BatchProcess):
         :param path: Target path of CSV export
         :param csv_name: CSV file name
         :param patient_id: Patient Identifier
+        :param chunk_size: Number of CSV rows buffered per write.
+        :param csv_file: Already-open target file to append to. When
+            None, the target is opened and closed within this call.
         """
         # full path of the target csv file
         tar_path = path + csv_name
 
-        create_header = not os.path.isfile(tar_path)
+        # First pass: only the bin count of each ROI is needed to size
+        # the table, so find the maximum sampled dose without touching
+        # the DVH data itself.
+        max_roi_dose = 0
+        for dvh in dict_dvh.values():
+            n_bins = len(dvh.relative_volume.counts)
+            if n_bins > 0:
+                last_sampled_dose = (n_bins - 1) // 10 * 10
+                if last_sampled_dose > max_roi_dose:
+                    max_roi_dose = last_sampled_dose
 
-        dvh_csv_list = []
+        csv_header = _DOSE_HEADERS.get(max_roi_dose)
+        if csv_header is None:
+            csv_header = ['Patient ID', 'ROI', 'Volume (mL)']
+            for i in range(0, max_roi_dose + 1, 10):
+                csv_header.append(str(i) + 'cGy')
+            _DOSE_HEADERS[max_roi_dose] = csv_header
 
-        csv_header = []
-        csv_header.append('Patient ID')
-        csv_header.append('ROI')
-        csv_header.append('Volume (mL)')
+        # Write through the handle the batch controller holds open for
+        # the whole batch if one was supplied; re-opening the target
+        # per patient re-acquires a descriptor and re-seeks to the end
+        # of the file every time.
+        if csv_file is not None:
+            self._write_csv_rows(csv_file, csv_header, dict_dvh,
+                                 patient_id, chunk_size)
+        else:
+            # A 1 MiB buffer lets whole chunks of rows reach the file
+            # in single writes.
+            with open(tar_path, 'a', newline='',
+                      buffering=1 << 20) as csv_file:
+                self._write_csv_rows(csv_file, csv_header, dict_dvh,
+                                     patient_id, chunk_size)
 
-        max_roi_dose = 0
+    @staticmethod
+    def _write_csv_rows(csv_file, csv_header, dict_dvh, patient_id,
+                        chunk_size):
+        """
+        Second pass of the CSV export: build each row already padded to
+        the final width and stream it out, so memory use stays constant
+        per ROI. The 0.0 padding is what fillna(0.0) used to do on the
+        DataFrame.
+        :param csv_file: Open file to append the rows to.
+        :param csv_header: Full list of column names.
+        :param dict_dvh: A dictionary of DVH {ROINumber: DVH}
+        :param patient_id: Patient Identifier
+        :param chunk_size: Number of CSV rows buffered per write.
+        """
+        total_cols = len(csv_header)
+        writer = csv.writer(csv_file, lineterminator='\n')
+
+        # The file position is only zero when nothing has been written
+        # yet, whether the handle was just opened or is being reused
+        # across patients.
+        if csv_file.tell() == 0:
+            writer.writerow(csv_header)
+
+        dvhs = list(dict_dvh.values())
+        n_dose_cols = total_cols - 3
+
+        # Process one chunk of ROIs at a time so the buffers handed to
+        # each write stay bounded regardless of ROI count.
+        for start in range(0, len(dvhs), chunk_size):
+            batch = dvhs[start:start + chunk_size]
 
-        for i in dict_dvh:
-            dvh_roi_list = []
-            dvh = dict_dvh[i]
-            name = dvh.name
-            volume = dvh.volume
-            dvh_roi_list.append(patient_id)
-            dvh_roi_list.append(name)
-            dvh_roi_list.append(volume)
-            dose = dvh.relative_volume.counts
-
-            for i in range(0, len(dose), 10):
-                dvh_roi_list.append(dose[i])
-                # Update the maximum dose value, if current dose
-                # exceeds the current maximum dose
-                if i > max_roi_dose:
-                    max_roi_dose = i
-
-            dvh_csv_list.append(dvh_roi_list)
-
-        for i in range(0, max_roi_dose + 1, 10):
-            csv_header.append(str(i) + 'cGy')
-
-        # Convert the list into pandas dataframe, with 2 digit rounding.
-        pddf_csv = pd.DataFrame(dvh_csv_list, columns=csv_header).round(2)
-        # Fill empty blocks with 0.0
-        pddf_csv.fillna(0.0, inplace=True)
-        pddf_csv.set_index('Patient ID', inplace=True)
-        # Convert and export pandas dataframe to CSV file
-        pddf_csv.to_csv(tar_path, mode='a', header=create_header)
+            # Write the sampled dose columns of the whole chunk into a
+            # pre-allocated dense buffer: each ROI contributes one
+            # strided-slice assignment, the zero initialization is the
+            # row padding, and a single in-place np.round covers every
+            # cell (the same np.round the DataFrame's .round(2)
+            # dispatched to).
+            out = np.zeros((len(batch), n_dose_cols), dtype=np.float64)
+            for row, dvh in enumerate(batch):
+                # Resolve the relative_volume property once per ROI;
+                # it may recompute on every access.
+                sampled = np.asarray(dvh.relative_volume.counts,
+                                     dtype=np.float64)[::10]
+                out[row, :sampled.size] = sampled
+            np.round(out, 2, out=out)
+
+            writer.writerows(
+                [patient_id, dvh.name, round(dvh.volume, 2)]
+                + out[row].tolist()
+                for row, dvh in enumerate(batch))
+
+    def set_csv_output(self, csv_file):
+        """
+        Supply an open file for the CSV export to append to, shared
+        across every patient in the batch.
+        :param csv_file: Open target file, owned by the caller.
+        """
+        self.csv_file = csv_file
 
     def set_filename(self, name):
         if name != '':
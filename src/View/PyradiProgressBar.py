@@ -171,7 +171,12 @@ class PyradiExtended(QtCore.QThread):
         #   'additionalInfo': True
         extractor = featureextractor.RadiomicsFeatureExtractor()
 
-        num_masks = len([file for file in os.listdir(mask_folder_path)])
+        # Scan the mask folder once for both the count and the loop
+        # below, instead of listing the directory twice.
+        with os.scandir(mask_folder_path) as it:
+            mask_files = [entry.name for entry in it if entry.is_file()]
+
+        num_masks = len(mask_files)
         progress_increment = (50/num_masks)
         progress_percent = 50
 
@@ -181,7 +186,7 @@ class PyradiExtended(QtCore.QThread):
         radiomics_headers = []
         feature_vector = ''
 
-        for file in os.listdir(mask_folder_path):
+        for file in mask_files:
             # Contains features for current ROI
             roi_features = []
             roi_features.append(patient_hash)